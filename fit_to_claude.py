@@ -8,235 +8,317 @@ Claude-compatible format for training analysis.
 
 import os
 import json
+import mmap
 import argparse
-from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Any
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Dict, List, Optional, Any, Set, Tuple
 import fitparse
+import numpy as np
 from pathlib import Path
 
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+# Output files a FIT file can be converted to
+OUTPUT_FORMATS = ("json", "md")
+
+# FIT messages read by extract_workout_data, all others are skipped
+_MESSAGE_TYPES = ('file_id', 'session', 'record', 'lap', 'event')
+
+# Fields kept from record, lap and event messages (besides their time field)
+_RECORD_FIELDS = ('position_lat', 'position_long', 'altitude', 'heart_rate', 'cadence',
+                  'distance', 'speed', 'power', 'temperature')
+_LAP_FIELDS = ('total_elapsed_time', 'total_timer_time', 'total_distance', 'avg_speed',
+               'max_speed', 'avg_heart_rate', 'max_heart_rate', 'total_calories', 'lap_trigger')
+_EVENT_FIELDS = ('event', 'event_type', 'data')
+
+
+def _message_values(message: fitparse.DataMessage) -> Dict[str, Any]:
+    """Returns all field values of a FIT message in a single pass
+    
+    Resolved subfields are stored under the name of their parent field,
+    so lookups match record.get_value() (e.g. 'product' for 'garmin_product').
+    """
+    values = {}
+    for field_data in message.fields:
+        field = field_data.parent_field or field_data.field
+        if field is not None and field.name not in values:
+            values[field.name] = field_data.value
+    return values
+
+
+def _compile_extractor(name: str, time_field: str, fields: Tuple[str, ...]):
+    """Generates a function copying the fields of a message that are not None
+    
+    The time field comes first as ISO string. All field names are written
+    into the generated code as constants, so extracting a message is
+    straight-line code without a loop over the field names.
+    """
+    lines = [
+        f"def {name}(values):",
+        "    get = values.get",
+        "    data = {}",
+        f"    value = get({time_field!r})",
+        "    if value:",
+        f"        data[{time_field!r}] = value.isoformat()"
+    ]
+    for field in fields:
+        lines += [
+            f"    value = get({field!r})",
+            "    if value is not None:",
+            f"        data[{field!r}] = value"
+        ]
+    lines.append("    return data")
+    namespace = {}
+    exec("\n".join(lines), namespace)
+    return namespace[name]
+
+
+_extract_record = _compile_extractor("_extract_record", 'timestamp', _RECORD_FIELDS)
+_extract_lap = _compile_extractor("_extract_lap", 'start_time', _LAP_FIELDS)
+_extract_event = _compile_extractor("_extract_event", 'timestamp', _EVENT_FIELDS)
+
+
+def _format_duration(seconds: float) -> str:
+    """Formats a duration in seconds as h:mm:ss (fractions of a second are dropped)"""
+    hours, remainder = divmod(int(seconds), 3600)
+    minutes, secs = divmod(remainder, 60)
+    return f"{hours}:{minutes:02d}:{secs:02d}"
+
+
+def _format_pace(speed: float) -> str:
+    """Formats a speed in m/s as pace per kilometer (m:ss)"""
+    minutes, seconds = divmod(int(1000 / speed), 60)
+    return f"{minutes}:{seconds:02d}"
+
+
+def _lap_column(laps: List[Dict[str, Any]], key: str) -> np.ndarray:
+    """Collects the values of a lap field into an array, skipping missing and zero values"""
+    return np.fromiter((lap[key] for lap in laps if lap.get(key)), dtype=np.float64)
+
+
+def _lap_stats(times: np.ndarray, distances: np.ndarray, speeds: np.ndarray,
+               heart_rates: np.ndarray) -> np.ndarray:
+    """Returns mean, min and max of each lap column as one row per column (zeros if empty)"""
+    stats = np.zeros((4, 3))
+    for row, column in enumerate((times, distances, speeds, heart_rates)):
+        if column.size:
+            stats[row, 0] = column.mean()
+            stats[row, 1] = column.min()
+            stats[row, 2] = column.max()
+    return stats
+
 
 class FitToClaudeConverter:
     """Converts FIT files to Claude-compatible format"""
     
-    def __init__(self, input_dir: str = "input", output_dir: str = "output"):
+    def __init__(self, input_dir: str = "input", output_dir: str = "output",
+                 formats: Optional[Set[str]] = None):
         self.input_dir = Path(input_dir)
         self.output_dir = Path(output_dir)
+        # Output files to write per FIT file: "json" and/or "md"
+        self.formats = set(formats) if formats is not None else set(OUTPUT_FORMATS)
+        if not self.formats or not self.formats <= set(OUTPUT_FORMATS):
+            raise ValueError(f"formats must be a non-empty subset of {OUTPUT_FORMATS}, got {sorted(self.formats)}")
         self.output_dir.mkdir(exist_ok=True)
+        # Output directory as string for building the output file paths
+        self._out_str = str(self.output_dir)
+        
+        # Message handlers used by extract_workout_data, keyed by FIT message name
+        self._handlers = {
+            'file_id': self._handle_file_id,
+            'session': self._handle_session,
+            'lap': self._handle_lap,
+            'event': self._handle_event
+        }
     
-    def extract_workout_data(self, fitfile: fitparse.FitFile) -> Dict[str, Any]:
-        """Extracts structured workout data from FIT file"""
+    def extract_workout_data(self, fitfile: fitparse.FitFile, keep_records: bool = False) -> Dict[str, Any]:
+        """Extracts structured workout data from FIT file
+        
+        Data points are always counted in records_count, but only collected
+        in records if keep_records is set.
+        """
         workout_data = {
             "metadata": {},
             "session_summary": {},
             "records": [],
+            "records_count": 0,
             "laps": [],
             "events": []
         }
         
-        # Parse all messages
-        for record in fitfile.get_messages():
+        # Parse all messages; records are handled inline as they make up most of the file
+        get_handler = self._handlers.get
+        records_append = workout_data["records"].append
+        records_count = 0
+        for record in fitfile.get_messages(name=_MESSAGE_TYPES):
             msg_type = record.name
+            if msg_type == 'record':
+                records_count += 1
+                if keep_records:
+                    records_append(_extract_record(_message_values(record)))
+                continue
             
-            if msg_type == 'file_id':
-                time_created = record.get_value('time_created')
-                workout_data["metadata"].update({
-                    "file_type": record.get_value('type'),
-                    "manufacturer": record.get_value('manufacturer'),
-                    "product": record.get_value('product'),
-                    "serial_number": record.get_value('serial_number'),
-                    "time_created": time_created.isoformat() if time_created else None
-                })
-            
-            elif msg_type == 'session':
-                start_time = record.get_value('start_time')
-                workout_data["session_summary"].update({
-                    "start_time": start_time.isoformat() if start_time else None,
-                    "total_elapsed_time": record.get_value('total_elapsed_time'),
-                    "total_timer_time": record.get_value('total_timer_time'),
-                    "total_distance": record.get_value('total_distance'),
-                    "total_calories": record.get_value('total_calories'),
-                    "avg_speed": record.get_value('avg_speed'),
-                    "max_speed": record.get_value('max_speed'),
-                    "avg_heart_rate": record.get_value('avg_heart_rate'),
-                    "max_heart_rate": record.get_value('max_heart_rate'),
-                    "avg_cadence": record.get_value('avg_cadence'),
-                    "max_cadence": record.get_value('max_cadence'),
-                    "sport": record.get_value('sport'),
-                    "sub_sport": record.get_value('sub_sport'),
-                    "total_ascent": record.get_value('total_ascent'),
-                    "total_descent": record.get_value('total_descent'),
-                    "min_altitude": record.get_value('min_altitude'),
-                    "max_altitude": record.get_value('max_altitude')
-                })
-            
-            elif msg_type == 'record':
-                timestamp = record.get_value('timestamp')
-                record_data = {
-                    "timestamp": timestamp.isoformat() if timestamp else None,
-                    "position_lat": record.get_value('position_lat'),
-                    "position_long": record.get_value('position_long'),
-                    "altitude": record.get_value('altitude'),
-                    "heart_rate": record.get_value('heart_rate'),
-                    "cadence": record.get_value('cadence'),
-                    "distance": record.get_value('distance'),
-                    "speed": record.get_value('speed'),
-                    "power": record.get_value('power'),
-                    "temperature": record.get_value('temperature')
-                }
-                # Remove None values
-                record_data = {k: v for k, v in record_data.items() if v is not None}
-                workout_data["records"].append(record_data)
-            
-            elif msg_type == 'lap':
-                start_time = record.get_value('start_time')
-                lap_data = {
-                    "start_time": start_time.isoformat() if start_time else None,
-                    "total_elapsed_time": record.get_value('total_elapsed_time'),
-                    "total_timer_time": record.get_value('total_timer_time'),
-                    "total_distance": record.get_value('total_distance'),
-                    "avg_speed": record.get_value('avg_speed'),
-                    "max_speed": record.get_value('max_speed'),
-                    "avg_heart_rate": record.get_value('avg_heart_rate'),
-                    "max_heart_rate": record.get_value('max_heart_rate'),
-                    "total_calories": record.get_value('total_calories'),
-                    "lap_trigger": record.get_value('lap_trigger')
-                }
-                lap_data = {k: v for k, v in lap_data.items() if v is not None}
-                workout_data["laps"].append(lap_data)
-            
-            elif msg_type == 'event':
-                timestamp = record.get_value('timestamp')
-                event_data = {
-                    "timestamp": timestamp.isoformat() if timestamp else None,
-                    "event": record.get_value('event'),
-                    "event_type": record.get_value('event_type'),
-                    "data": record.get_value('data')
-                }
-                event_data = {k: v for k, v in event_data.items() if v is not None}
-                workout_data["events"].append(event_data)
+            handler = get_handler(msg_type)
+            if handler:
+                handler(_message_values(record), workout_data)
         
+        workout_data["records_count"] = records_count
         return workout_data
     
+    def _handle_file_id(self, values: Dict[str, Any], workout_data: Dict[str, Any]) -> None:
+        """Extracts device metadata from a file_id message"""
+        time_created = values.get('time_created')
+        workout_data["metadata"].update({
+            "file_type": values.get('type'),
+            "manufacturer": values.get('manufacturer'),
+            "product": values.get('product'),
+            "serial_number": values.get('serial_number'),
+            "time_created": time_created.isoformat() if time_created else None
+        })
+    
+    def _handle_session(self, values: Dict[str, Any], workout_data: Dict[str, Any]) -> None:
+        """Extracts the overall statistics from a session message"""
+        start_time = values.get('start_time')
+        workout_data["session_summary"].update({
+            "start_time": start_time.isoformat() if start_time else None,
+            "total_elapsed_time": values.get('total_elapsed_time'),
+            "total_timer_time": values.get('total_timer_time'),
+            "total_distance": values.get('total_distance'),
+            "total_calories": values.get('total_calories'),
+            "avg_speed": values.get('avg_speed'),
+            "max_speed": values.get('max_speed'),
+            "avg_heart_rate": values.get('avg_heart_rate'),
+            "max_heart_rate": values.get('max_heart_rate'),
+            "avg_cadence": values.get('avg_cadence'),
+            "max_cadence": values.get('max_cadence'),
+            "sport": values.get('sport'),
+            "sub_sport": values.get('sub_sport'),
+            "total_ascent": values.get('total_ascent'),
+            "total_descent": values.get('total_descent'),
+            "min_altitude": values.get('min_altitude'),
+            "max_altitude": values.get('max_altitude'),
+            # Internal: datetime for the summary, not written to the JSON file
+            "_start_time_obj": start_time
+        })
+    
+    def _handle_lap(self, values: Dict[str, Any], workout_data: Dict[str, Any]) -> None:
+        """Extracts the interval data from a lap message"""
+        workout_data["laps"].append(_extract_lap(values))
+    
+    def _handle_event(self, values: Dict[str, Any], workout_data: Dict[str, Any]) -> None:
+        """Extracts a timer or device event from an event message"""
+        workout_data["events"].append(_extract_event(values))
+    
     def generate_training_summary(self, workout_data: Dict[str, Any]) -> str:
         """Generates compact factual summary without evaluation for Claude"""
         summary = []
+        append = summary.append
         session = workout_data.get("session_summary", {})
         
-        # Basic information
-        start_time = session.get("start_time")
-        if start_time:
-            dt = datetime.fromisoformat(start_time.replace('Z', '+00:00'))
-            summary.append(f"# Training from {dt.strftime('%d.%m.%Y')}")
-            summary.append(f"**Start time:** {dt.strftime('%H:%M:%S')}")
-            summary.append(f"**Weekday:** {dt.strftime('%A')}")
+        # Basic information (ISO string only parsed for data not from extract_workout_data)
+        dt = session.get("_start_time_obj")
+        if dt is None and session.get("start_time"):
+            dt = datetime.fromisoformat(session["start_time"].replace('Z', '+00:00'))
+        if dt:
+            append(f"# Training from {dt.strftime('%d.%m.%Y')}")
+            append(f"**Start time:** {dt.strftime('%H:%M:%S')}")
+            append(f"**Weekday:** {dt.strftime('%A')}")
         
         # Training duration and distance
         if session.get("total_timer_time"):
             total_seconds = session["total_timer_time"]
-            duration = timedelta(seconds=total_seconds)
-            summary.append(f"**Total time:** {duration} ({total_seconds/60:.1f} minutes)")
+            duration = _format_duration(total_seconds)
+            append(f"**Total time:** {duration} ({total_seconds/60:.1f} minutes)")
             
         if session.get("total_elapsed_time"):
             elapsed_seconds = session["total_elapsed_time"] 
             if elapsed_seconds != session.get("total_timer_time"):
-                summary.append(f"**Elapsed time:** {timedelta(seconds=elapsed_seconds)}")
+                append(f"**Elapsed time:** {_format_duration(elapsed_seconds)}")
         
         if session.get("total_distance"):
             distance_km = session["total_distance"] / 1000
-            summary.append(f"**Distance:** {distance_km:.2f} km")
+            append(f"**Distance:** {distance_km:.2f} km")
         
         # Pace and speed
         if session.get("avg_speed"):
             avg_speed_kmh = session["avg_speed"] * 3.6
-            summary.append(f"**Average speed:** {avg_speed_kmh:.2f} km/h")
+            append(f"**Average speed:** {avg_speed_kmh:.2f} km/h")
             
-            # Calculate pace
-            avg_pace_per_km = 1000 / session["avg_speed"]
-            pace_minutes = int(avg_pace_per_km // 60)
-            pace_seconds = int(avg_pace_per_km % 60)
-            summary.append(f"**Average pace:** {pace_minutes}:{pace_seconds:02d} min/km")
+            append(f"**Average pace:** {_format_pace(session['avg_speed'])} min/km")
         
         if session.get("max_speed"):
             max_speed_kmh = session["max_speed"] * 3.6
-            summary.append(f"**Maximum speed:** {max_speed_kmh:.2f} km/h")
+            append(f"**Maximum speed:** {max_speed_kmh:.2f} km/h")
         
         # Heart rate
         if session.get("avg_heart_rate"):
-            summary.append(f"**Average heart rate:** {session['avg_heart_rate']} bpm")
+            append(f"**Average heart rate:** {session['avg_heart_rate']} bpm")
         if session.get("max_heart_rate"):
-            summary.append(f"**Maximum heart rate:** {session['max_heart_rate']} bpm")
+            append(f"**Maximum heart rate:** {session['max_heart_rate']} bpm")
         
         # Elevation data
         if session.get("total_ascent"):
-            summary.append(f"**Total ascent:** {session['total_ascent']} m")
+            append(f"**Total ascent:** {session['total_ascent']} m")
         if session.get("total_descent"):
-            summary.append(f"**Total descent:** {session['total_descent']} m")
+            append(f"**Total descent:** {session['total_descent']} m")
         if session.get("min_altitude") is not None:
-            summary.append(f"**Minimum altitude:** {session['min_altitude']:.0f} m")
+            append(f"**Minimum altitude:** {session['min_altitude']:.0f} m")
         if session.get("max_altitude") is not None:
-            summary.append(f"**Maximum altitude:** {session['max_altitude']:.0f} m")
+            append(f"**Maximum altitude:** {session['max_altitude']:.0f} m")
         
         # Additional metrics
         if session.get("total_calories"):
-            summary.append(f"**Calories:** {session['total_calories']} kcal")
+            append(f"**Calories:** {session['total_calories']} kcal")
         if session.get("avg_cadence"):
-            summary.append(f"**Average cadence:** {session['avg_cadence']} spm")
+            append(f"**Average cadence:** {session['avg_cadence']} spm")
         if session.get("max_cadence"):
-            summary.append(f"**Maximum cadence:** {session['max_cadence']} spm")
+            append(f"**Maximum cadence:** {session['max_cadence']} spm")
         
         # Interval information with speeds
         laps = workout_data.get("laps", [])
         if laps:
-            summary.append(f"\n## Intervals ({len(laps)} intervals)")
+            append(f"\n## Intervals ({len(laps)} intervals)")
             
             # Detailed interval statistics
-            lap_times = [lap.get("total_timer_time", 0) for lap in laps if lap.get("total_timer_time")]
-            lap_distances = [lap.get("total_distance", 0) for lap in laps if lap.get("total_distance")]
-            lap_speeds = [lap.get("avg_speed", 0) for lap in laps if lap.get("avg_speed")]
-            lap_hr = [lap.get("avg_heart_rate", 0) for lap in laps if lap.get("avg_heart_rate")]
+            lap_times = _lap_column(laps, "total_timer_time")
+            lap_distances = _lap_column(laps, "total_distance")
+            lap_speeds = _lap_column(laps, "avg_speed")
+            lap_hr = _lap_column(laps, "avg_heart_rate")
+            
+            # Rows: time, distance, speed, heart rate; columns: mean, min, max
+            stats = _lap_stats(lap_times, lap_distances, lap_speeds, lap_hr)
             
-            if lap_times:
-                avg_lap_time = sum(lap_times) / len(lap_times)
-                summary.append(f"**Average interval time:** {timedelta(seconds=avg_lap_time)}")
-                summary.append(f"**Shortest interval:** {timedelta(seconds=min(lap_times))}")
-                summary.append(f"**Longest interval:** {timedelta(seconds=max(lap_times))}")
+            if lap_times.size:
+                append(f"**Average interval time:** {_format_duration(stats[0, 0])}")
+                append(f"**Shortest interval:** {_format_duration(stats[0, 1])}")
+                append(f"**Longest interval:** {_format_duration(stats[0, 2])}")
             
-            if lap_distances:
-                avg_lap_dist = sum(lap_distances) / len(lap_distances) / 1000
-                summary.append(f"**Average interval distance:** {avg_lap_dist:.3f} km")
+            if lap_distances.size:
+                append(f"**Average interval distance:** {stats[1, 0] / 1000:.3f} km")
             
-            if lap_speeds:
+            if lap_speeds.size:
                 # Speeds per interval in km/h and as pace
-                avg_lap_speed_kmh = sum(speed * 3.6 for speed in lap_speeds) / len(lap_speeds)
-                min_speed_kmh = min(lap_speeds) * 3.6
-                max_speed_kmh = max(lap_speeds) * 3.6
-                summary.append(f"**Average interval speed:** {avg_lap_speed_kmh:.2f} km/h")
-                summary.append(f"**Slowest interval speed:** {min_speed_kmh:.2f} km/h")
-                summary.append(f"**Fastest interval speed:** {max_speed_kmh:.2f} km/h")
+                append(f"**Average interval speed:** {stats[2, 0] * 3.6:.2f} km/h")
+                append(f"**Slowest interval speed:** {stats[2, 1] * 3.6:.2f} km/h")
+                append(f"**Fastest interval speed:** {stats[2, 2] * 3.6:.2f} km/h")
                 
                 # Paces for intervals
-                avg_pace_per_km = 1000 / (sum(lap_speeds) / len(lap_speeds))
-                min_pace_per_km = 1000 / max(lap_speeds)
-                max_pace_per_km = 1000 / min(lap_speeds)
-                
-                avg_pace_min, avg_pace_sec = int(avg_pace_per_km // 60), int(avg_pace_per_km % 60)
-                min_pace_min, min_pace_sec = int(min_pace_per_km // 60), int(min_pace_per_km % 60)
-                max_pace_min, max_pace_sec = int(max_pace_per_km // 60), int(max_pace_per_km % 60)
-                
-                summary.append(f"**Average interval pace:** {avg_pace_min}:{avg_pace_sec:02d} min/km")
-                summary.append(f"**Fastest interval pace:** {min_pace_min}:{min_pace_sec:02d} min/km")
-                summary.append(f"**Slowest interval pace:** {max_pace_min}:{max_pace_sec:02d} min/km")
+                append(f"**Average interval pace:** {_format_pace(stats[2, 0])} min/km")
+                append(f"**Fastest interval pace:** {_format_pace(stats[2, 2])} min/km")
+                append(f"**Slowest interval pace:** {_format_pace(stats[2, 1])} min/km")
             
-            if lap_hr:
-                avg_lap_hr = sum(lap_hr) / len(lap_hr)
-                min_hr = min(lap_hr)
-                max_hr = max(lap_hr)
-                summary.append(f"**Average heart rate in intervals:** {avg_lap_hr:.0f} bpm")
-                summary.append(f"**Lowest interval heart rate:** {min_hr} bpm")
-                summary.append(f"**Highest interval heart rate:** {max_hr} bpm")
+            if lap_hr.size:
+                append(f"**Average heart rate in intervals:** {stats[3, 0]:.0f} bpm")
+                append(f"**Lowest interval heart rate:** {stats[3, 1]:.0f} bpm")
+                append(f"**Highest interval heart rate:** {stats[3, 2]:.0f} bpm")
             
             # List individual intervals
-            summary.append(f"\n### Individual intervals:")
+            append(f"\n### Individual intervals:")
             for i, lap in enumerate(laps[:10], 1):  # Show only the first 10 intervals
                 lap_time = lap.get("total_timer_time", 0)
                 lap_dist = lap.get("total_distance", 0) / 1000
@@ -245,75 +327,80 @@ class FitToClaudeConverter:
                 
                 if lap_time and lap_speed:
                     speed_kmh = lap_speed * 3.6
-                    pace_per_km = 1000 / lap_speed if lap_speed > 0 else 0
-                    pace_min, pace_sec = int(pace_per_km // 60), int(pace_per_km % 60)
-                    
-                    interval_info = f"**Interval {i}:** {timedelta(seconds=lap_time)}, {lap_dist:.2f}km, {speed_kmh:.1f}km/h ({pace_min}:{pace_sec:02d}min/km)"
-                    if lap_hr_val:
-                        interval_info += f", {lap_hr_val}bpm"
-                    summary.append(interval_info)
+                    hr_info = f", {lap_hr_val}bpm" if lap_hr_val else ""
+                    append(f"**Interval {i}:** {_format_duration(lap_time)}, {lap_dist:.2f}km, {speed_kmh:.1f}km/h ({_format_pace(lap_speed)}min/km){hr_info}")
             
             if len(laps) > 10:
-                summary.append(f"... and {len(laps) - 10} more intervals")
+                append(f"... and {len(laps) - 10} more intervals")
         
         # Device information
         metadata = workout_data.get("metadata", {})
         if metadata.get("manufacturer"):
-            summary.append(f"\n## Device information")
-            summary.append(f"**Manufacturer:** {metadata.get('manufacturer')}")
+            append(f"\n## Device information")
+            append(f"**Manufacturer:** {metadata.get('manufacturer')}")
             if metadata.get("product"):
-                summary.append(f"**Product:** {metadata.get('product')}")
+                append(f"**Product:** {metadata.get('product')}")
             if metadata.get("serial_number"):
-                summary.append(f"**Serial number:** {metadata.get('serial_number')}")
+                append(f"**Serial number:** {metadata.get('serial_number')}")
         
         # Data point information
-        records_count = len(workout_data.get("records", []))
+        records_count = workout_data.get("records_count", 0)
         if records_count > 0:
-            summary.append(f"\n**Data points:** {records_count}")
+            append(f"\n**Data points:** {records_count}")
             
             # Estimate recording frequency
             if session.get("total_timer_time") and records_count > 1:
                 recording_interval = session["total_timer_time"] / records_count
-                summary.append(f"**Recording interval:** approx. {recording_interval:.1f} seconds")
+                append(f"**Recording interval:** approx. {recording_interval:.1f} seconds")
         
         return "\n".join(summary)
     
     def convert_file(self, fit_file_path: Path) -> Dict[str, str]:
         """Converts a FIT file"""
         try:
-            # Parse FIT file
-            fitfile = fitparse.FitFile(str(fit_file_path))
-            workout_data = self.extract_workout_data(fitfile)
+            # Parse FIT file from a read-only memory map, which FitFile closes again
+            with open(fit_file_path, 'rb') as f:
+                mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            with fitparse.FitFile(mapped) as fitfile:
+                workout_data = self.extract_workout_data(fitfile)
             
             # Create output files
             base_name = fit_file_path.stem
+            result = {"status": "success"}
             
             # Compact JSON file with essential data only (without raw data)
-            json_path = self.output_dir / f"{base_name}.json"
-            compact_data = {
-                "metadata": workout_data.get("metadata", {}),
-                "session_summary": workout_data.get("session_summary", {}),
-                "lap_summary": {
-                    "count": len(workout_data.get("laps", [])),
-                    "laps": workout_data.get("laps", [])[:10]  # Only first 10 laps
-                },
-                "record_count": len(workout_data.get("records", [])),
-                "events_count": len(workout_data.get("events", []))
-            }
-            with open(json_path, 'w', encoding='utf-8') as f:
-                json.dump(compact_data, f, indent=2, ensure_ascii=False)
+            if "json" in self.formats:
+                json_path = os.path.join(self._out_str, f"{base_name}.json")
+                compact_data = {
+                    "metadata": workout_data.get("metadata", {}),
+                    "session_summary": {
+                        key: value for key, value in workout_data.get("session_summary", {}).items()
+                        if not key.startswith('_')
+                    },
+                    "lap_summary": {
+                        "count": len(workout_data.get("laps", [])),
+                        "laps": workout_data.get("laps", [])[:10]  # Only first 10 laps
+                    },
+                    "record_count": workout_data.get("records_count", 0),
+                    "events_count": len(workout_data.get("events", []))
+                }
+                if orjson is not None:
+                    json_bytes = orjson.dumps(compact_data, option=orjson.OPT_INDENT_2, default=str)
+                else:
+                    json_bytes = json.dumps(compact_data, indent=2, ensure_ascii=False, default=str).encode('utf-8')
+                with open(json_path, 'wb') as f:
+                    f.write(json_bytes)
+                result["json_file"] = json_path
             
             # Markdown file for factual training summary
-            markdown_path = self.output_dir / f"{base_name}.md"
-            summary = self.generate_training_summary(workout_data)
-            with open(markdown_path, 'w', encoding='utf-8') as f:
-                f.write(summary)
+            if "md" in self.formats:
+                markdown_path = os.path.join(self._out_str, f"{base_name}.md")
+                summary = self.generate_training_summary(workout_data)
+                with open(markdown_path, 'wb') as f:
+                    f.write(summary.encode('utf-8'))
+                result["markdown_file"] = markdown_path
             
-            return {
-                "status": "success",
-                "json_file": str(json_path),
-                "markdown_file": str(markdown_path)
-            }
+            return result
             
         except Exception as e:
             return {
@@ -322,36 +409,81 @@ class FitToClaudeConverter:
                 "file": str(fit_file_path)
             }
     
-    def convert_all(self) -> List[Dict[str, str]]:
-        """Converts all FIT files in the input directory"""
+    def convert_all(self, max_workers: Optional[int] = None) -> List[Dict[str, str]]:
+        """Converts all FIT files in the input directory in parallel"""
+        if max_workers is not None and max_workers < 1:
+            raise ValueError(f"max_workers must be at least 1, got {max_workers}")
         results = []
         
         if not self.input_dir.exists():
             print(f"Input directory {self.input_dir} does not exist!")
             return results
         
-        fit_files = list(self.input_dir.glob("*.fit"))
+        # Sort files chronologically by modification time
+        with os.scandir(self.input_dir) as entries:
+            fit_entries = sorted(
+                (entry for entry in entries if entry.name.endswith('.fit') and entry.is_file()),
+                key=lambda entry: (entry.stat().st_mtime, entry.name)
+            )
+        fit_files = [Path(entry.path) for entry in fit_entries]
         if not fit_files:
             print(f"No .fit files found in {self.input_dir}!")
             return results
         
-        # Sort files by date
-        fit_files.sort()
-        
         print(f"Converting {len(fit_files)} FIT files...")
         
-        for fit_file in fit_files:
-            print(f"Processing: {fit_file.name}")
-            result = self.convert_file(fit_file)
-            results.append(result)
-            
-            if result["status"] == "success":
-                print(f"  ✓ Successfully converted")
-            else:
-                print(f"  ✗ Error: {result['error']}")
+        workers = min(len(fit_files), max_workers or os.cpu_count() or 1)
+        if workers == 1:
+            # A worker pool only adds process startup cost for a single worker
+            for fit_file in fit_files:
+                print(f"Processing: {fit_file.name}")
+                result = self.convert_file(fit_file)
+                results.append(result)
+                
+                if result["status"] == "success":
+                    print(f"  ✓ Successfully converted")
+                else:
+                    print(f"  ✗ Error: {result['error']}")
+            return results
+        
+        # Files are independent, so each one is converted in its own worker process
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(self,)) as executor:
+            for fit_file, result in zip(fit_files, executor.map(_convert_in_worker, fit_files)):
+                results.append(result)
+                
+                if result["status"] == "success":
+                    print(f"  ✓ {fit_file.name}: Successfully converted")
+                else:
+                    print(f"  ✗ {fit_file.name}: Error: {result['error']}")
         
         return results
-    
+
+
+# Converter instance of the current worker process, set by _init_worker
+_worker_converter: Optional[FitToClaudeConverter] = None
+
+
+def _init_worker(converter: FitToClaudeConverter) -> None:
+    """Stores the converter for the FIT files handled by this worker process"""
+    global _worker_converter
+    _worker_converter = converter
+
+
+def _convert_in_worker(fit_file_path: Path) -> Dict[str, str]:
+    """Converts a FIT file inside a worker process"""
+    return _worker_converter.convert_file(fit_file_path)
+
+
+def _positive_int(value: str) -> int:
+    """Parses a command line argument as integer of at least 1"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"must be an integer, got {value!r}")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {number}")
+    return number
 
 
 def main():
@@ -359,10 +491,14 @@ def main():
     parser.add_argument("--input", "-i", default="input", help="Input directory (default: input)")
     parser.add_argument("--output", "-o", default="output", help="Output directory (default: output)")
     parser.add_argument("--file", "-f", help="Convert only a specific file")
+    parser.add_argument("--jobs", "-j", type=_positive_int, help="Number of parallel worker processes (default: CPU count)")
+    parser.add_argument("--format", choices=["json", "md", "both"], default="both",
+                        help="Output files to write (default: both)")
     
     args = parser.parse_args()
     
-    converter = FitToClaudeConverter(args.input, args.output)
+    formats = set(OUTPUT_FORMATS) if args.format == "both" else {args.format}
+    converter = FitToClaudeConverter(args.input, args.output, formats)
     
     if args.file:
         fit_file = Path(args.file)
@@ -371,11 +507,11 @@ def main():
             return
         result = converter.convert_file(fit_file)
         if result["status"] == "success":
-            print(f"Successfully converted: {result['markdown_file']}")
+            print(f"Successfully converted: {result.get('markdown_file') or result['json_file']}")
         else:
             print(f"Error: {result['error']}")
     else:
-        results = converter.convert_all()
+        results = converter.convert_all(args.jobs)
         
         success_count = sum(1 for r in results if r["status"] == "success")
         print(f"\nConversion completed: {success_count}/{len(results)} successful")